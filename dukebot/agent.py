@@ -1,224 +1,587 @@
-from langchain.agents import initialize_agent, AgentType
-from langchain_community.chat_models import ChatOpenAI
-from langchain.memory import ConversationBufferMemory
-from langchain_core.tools import Tool
-from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate, MessagesPlaceholder
+# LangChain (and the tools module, which pulls in the OpenAI client) are
+# imported lazily inside create_duke_agent: importing the LangChain stack
+# costs seconds of cold-start, and short-lived invocations that never build
+# the agent should not pay it.
+import asyncio
+import hashlib
+import math
 import os
+import threading
 from dotenv import load_dotenv
 
 serpapi_api_key = os.getenv("SERPAPI_API_KEY")
 
-# Import your custom tools from tools.py
-from tools import (
-    get_curriculum_with_subject_from_duke_api,
-    get_events_from_duke_api_single_input,
-    get_course_details_single_input,
-    get_people_information_from_duke_api,
-    search_subject_by_code,
-    search_group_format,
-    search_category_format,
-    get_pratt_info_from_serpapi,
-)
-
 # Load environment variables from .env file
 load_dotenv()
 
-def create_duke_agent():
+# System prompt for the agentic search approach. Kept as a frozen module
+# constant so every request sends a byte-identical prefix and provider-side
+# prompt caching can hit; nothing dynamic may be interpolated into it.
+SYSTEM_PROMPT = """
+    You are DukeBot, an authoritative and knowledgeable Duke University assistant with access to a suite of specialized Duke API tools. Your mission is to accurately and professionally provide information on three primary areas:
+
+    1. **AI MEng Program Information**: Deliver detailed and reliable information about the AI MEng program. This includes curriculum details, admissions criteria, faculty expertise, career outcomes, and any unique features of the program.
+
+    2. **Prospective Student Information**: Provide factual and comprehensive information for prospective students about Duke University and Duke Pratt School of Engineering. Include key figures, campus life details, academic programs, admissions statistics, financial aid information, and notable achievements.
+
+    3. **Campus Events**: Retrieve and present up-to-date information on events happening on campus. Ensure that events are filtered correctly by organizer groups and thematic categories.
+
+    For every query, follow these steps:
+
+    1. **THINK**:
+    - Carefully analyze the user’s query to determine which domain(s) it touches: AI MEng details, prospective student facts, or campus events.
+    - Decide which API tools are the best fit to get accurate data.
+    - If it is a general query, use the PrattSearch tool to find relevant information first, then use the specialized tools for specific details.
+
+    2. **FORMAT SEARCH**:
+    - NEVER pass user-provided subject, group, or category formats directly to the API tools.
+    - Use the search_formats tool to find and confirm the correct, official formats for any subjects, groups, or categories mentioned — pass all of them in one call rather than resolving them one by one.
+    - If the query includes ambiguous or multiple potential matches, ask the user for clarification or select the most likely candidate.
+
+    3. **ACT**:
+    - Once you have validated and formatted all input parameters, execute the correct API call(s) using the specialized Duke API tools.
+    - For example, use the "get_duke_events" tool for event queries or the appropriate tool for retrieving AI MEng program details or prospective student information.
+
+    4. **OBSERVE**:
+    - Analyze and verify the data returned from the API tools.
+    - Check that the returned results align with the user’s query and that all required formatting is correct.
+
+    5. **RESPOND**:
+    - Synthesize the fetched data into a clear, concise, and helpful response. Your answer should be accurate, professional, and tailored to the query’s focus (whether program details, key facts and figures, or event listings).
+    - Do not mention internal formatting or search corrections unless necessary to help the user understand any issues.
+
+    Remember:
+    - Never bypass input validation: always convert user input into the official formats through your search tools before calling an API.
+    - If a query needs several independent lookups (e.g., both courses and events), issue those tool calls together in a single response instead of one at a time; they will be executed in parallel.
+    - If there is uncertainty or multiple matches, ask the user to clarify rather than guessing.
+    - Your responses should reflect Duke University's excellence and the specialized capabilities of Duke Pratt School of Engineering.
+    - If you call a tool, always check the input format and pass the correct arguments to the tool.
+
+    By following these steps, you ensure every query about the AI MEng program, prospective student information, or campus events is handled precisely and professionally.
     """
-    Create a LangChain agent with the Duke tools.
-    API keys are loaded from .env file.
-    
+
+# Tool description strings, hoisted to module constants so they are built
+# once and create_duke_tools just references them. They are rendered into
+# every request's tool schema, so like SYSTEM_PROMPT they must stay frozen
+# for the prompt prefix to be byte-identical across calls.
+EVENTS_TOOL_DESCRIPTION = (
+    "This tool retrieves upcoming events from Duke University's public calendar API based on a free-form natural language query. "
+    "It processes your query by automatically mapping your input to the correct organizer groups and thematic categories. "
+    "To do this, it reads the full lists of valid groups and categories from local text files, then uses fuzzy matching or retrieval-augmented generation "
+    "to narrow these lists to the most relevant candidates. An LLM is subsequently used to select the final filter values; if no suitable filters "
+    "are found, it defaults to ['All'] to maintain a valid API call. \n\n"
+    "Parameters:\n"
+    "  - prompt (str): A natural language description of the event filters you wish to apply (e.g., 'Please give me the events of AIPI').\n"
+    "  - feed_type (str): The desired format for the returned data. Accepted values include 'rss', 'js', 'ics', 'csv', 'json', and 'jsonp'.\n"
+    "  - future_days (int): The number of days into the future for which to retrieve events (default is 45).\n"
+    "  - filter_method_group (bool): Defines filtering for organizer groups. If True, an event is included if it matches ANY specified group; "
+    "if False, it must match ALL specified groups.\n"
+    "  - filter_method_category (bool): Defines filtering for thematic categories. If True, an event is included if it matches ANY specified category; "
+    "if False, it must match ALL specified categories.\n\n"
+    "The tool returns the raw event data from Duke University's calendar API, or an error message if the API request fails."
+)
+
+CURRICULUM_TOOL_DESCRIPTION = (
+    "Use this tool to retrieve curriculum information from Duke University's API."
+    "IMPORTANT: The 'subject' parameter must be from subjects.txt list. "
+    "Parameters:"
+    "   subject (str): The subject to get curriculum data for. For example, the subject is 'ARABIC-Arabic'."
+    "Return:"
+    "   str: Raw curriculum data in JSON format or an error message. If valid result, the response will contain each course's course id and course offer number for further queries."
+)
+
+COURSE_DETAILS_TOOL_DESCRIPTION = (
+    "Use this tool to retrieve detailed curriculum information from Duke University's API. "
+    "You must provide both a valid course ID (course_id) and a course offer number (course_offer_number), "
+    "but **pass them as a single string** in the format 'course_id,course_offer_number'. "
+    "\n\nFor example:\n"
+    "  '027568,1' for course_id='027568' and course_offer_number='1'.\n\n"
+    "These parameters can be obtained from get_curriculum_with_subject_from_duke_api, which returns a list "
+    "of courses (each with a 'crse_id' and 'crse_offer_nbr').\n\n"
+    "Parameters:\n"
+    "  - course_id (str): The unique ID of the course, e.g. '029248'.\n"
+    "  - course_offer_number (str): The offer number for that course, e.g. '1'.\n\n"
+    "Return:\n"
+    "  - str: Raw curriculum data in JSON format, or an error message if something goes wrong."
+)
+
+COURSES_BATCH_TOOL_DESCRIPTION = (
+    "Use this tool to retrieve detailed information for SEVERAL courses at once. "
+    "Pass all the 'course_id,course_offer_number' pairs in a single call, separated "
+    "by semicolons (e.g. '027568,1; 029248,1'); the lookups run in parallel. "
+    "Prefer this over repeated get_detailed_course_information_from_duke_api calls "
+    "whenever you need more than one course."
+)
+
+PEOPLE_TOOL_DESCRIPTION = (
+    "Use this tool to retrieve people information from Duke University's API."
+    "Parameters:"
+    "   name (str): The name to get people data for. For example, the name is 'Brinnae Bent'."
+    "Return:"
+    "   str: Raw people data in JSON format or an error message."
+)
+
+SEARCH_FORMATS_TOOL_DESCRIPTION = (
+    "Use this tool to find the correct formats of subjects, groups, and categories "
+    "before using get_curriculum_with_subject_from_duke_api or get_duke_events. "
+    "It resolves all three in ONE call, so never call it more than once per query. "
+    "Pass a JSON object with any of the keys 'subject', 'group', and 'category'. "
+    "Example: '{\"subject\": \"cs\", \"group\": \"data science\", \"category\": \"ai\"}' "
+    "might return 'COMPSCI - Computer Science', '+DataScience (+DS)', and 'Artificial Intelligence'. "
+    "This tool handles case-insensitive matching and partial matches. "
+    "Always use this tool first if you're uncertain about the exact formats."
+)
+
+FINAL_ANSWER_TOOL_DESCRIPTION = (
+    "Call this when you have the complete final answer for the user. "
+    "Pass the full response as a string; it is returned to the user "
+    "as-is, ending the turn without another reasoning step."
+)
+
+PRATT_SEARCH_TOOL_DESCRIPTION = (
+    "Use this tool to search for information about Duke Pratt School of Engineering. "
+    "Specify your search query."
+)
+
+def create_duke_tools(include_pratt=True):
+    """
+    Build the Duke tool set shared by both agent factories.
+
+    Args:
+        include_pratt (bool): Whether to include the SerpAPI-backed
+            PrattSearch tool.
+
     Returns:
-        An initialized LangChain agent
+        list: The Tool instances, sorted by name so the serialized tool
+        descriptions form a deterministic, cacheable prompt prefix.
     """
-    # Get API keys from environment variables
-    openai_api_key = os.getenv("OPENAI_API_KEY")
-    
-    # Check if API keys are available
-    if not openai_api_key:
-        raise ValueError("OPENAI_API_KEY not found in environment variables")
-    
+    # Deferred imports: see the note at the top of the module
+    from langchain_core.tools import Tool
+    from pydantic import BaseModel, Field
+
+    from tools import (
+        aget_course_details_single_input,
+        aget_curriculum_with_subject_from_duke_api,
+        aget_events_from_duke_api_single_input,
+        aget_people_information_from_duke_api,
+        get_curriculum_with_subject_from_duke_api,
+        get_detailed_courses_batch,
+        get_events_from_duke_api_single_input,
+        get_course_details_single_input,
+        get_people_information_from_duke_api,
+        search_formats,
+        get_pratt_info_from_serpapi,
+    )
+
+    # Typed argument schemas. These are emitted to the model as the OpenAI
+    # function-calling schema, so malformed tool calls (and the corrective
+    # LLM turns handle_parsing_errors would spend fixing them) mostly
+    # disappear. Every tool here takes one string; the schema documents the
+    # exact format that string must follow.
+    class EventsArgs(BaseModel):
+        arg_str: str = Field(..., description=(
+            "Comma-separated as 'prompt, feed_type, future_days, "
+            "filter_method_group, filter_method_category'; only the natural "
+            "language prompt is required, e.g. 'events related to AI'."
+        ))
+
+    class CurriculumArgs(BaseModel):
+        subject: str = Field(..., description=(
+            "Exact subject format from subjects.txt, e.g. "
+            "'AIPI - AI for Product Innovation'."
+        ))
+
+    class CourseDetailsArgs(BaseModel):
+        arg_str: str = Field(..., description=(
+            "Course ID and course offer number as a single string "
+            "'course_id,course_offer_number', e.g. '027568,1'."
+        ))
+
+    class CoursesBatchArgs(BaseModel):
+        arg_str: str = Field(..., description=(
+            "Semicolon-separated 'course_id,course_offer_number' pairs, "
+            "e.g. '027568,1; 029248,1'."
+        ))
+
+    class PeopleArgs(BaseModel):
+        name: str = Field(..., description=(
+            "The person's name to look up, e.g. 'Brinnae Bent'."
+        ))
+
+    class SearchFormatsArgs(BaseModel):
+        arg_str: str = Field(..., description=(
+            "JSON object with any of the keys 'subject', 'group', and "
+            "'category', e.g. '{\"subject\": \"cs\", \"category\": \"ai\"}'."
+        ))
+
+    class FinalAnswerArgs(BaseModel):
+        text: str = Field(..., description=(
+            "The complete final answer to return to the user."
+        ))
+
+    class PrattSearchArgs(BaseModel):
+        query: str = Field(..., description=(
+            "Search query about Duke Pratt School of Engineering."
+        ))
+
+    async def apratt_search(query):
+        # SerpAPI fetch stays sync; run it in a worker thread so it can
+        # still overlap with other tool calls under the async executor.
+        return await asyncio.to_thread(
+            get_pratt_info_from_serpapi,
+            query="Duke Pratt School of Engineering " + query,
+            api_key=serpapi_api_key,
+            filter_domain=True
+        )
+
     # Define the tools
     tools = [
         Tool(
             name="get_duke_events",
             func=get_events_from_duke_api_single_input,
-            description=(
-                "This tool retrieves upcoming events from Duke University's public calendar API based on a free-form natural language query. "
-                "It processes your query by automatically mapping your input to the correct organizer groups and thematic categories. "
-                "To do this, it reads the full lists of valid groups and categories from local text files, then uses fuzzy matching or retrieval-augmented generation "
-                "to narrow these lists to the most relevant candidates. An LLM is subsequently used to select the final filter values; if no suitable filters "
-                "are found, it defaults to ['All'] to maintain a valid API call. \n\n"
-                "Parameters:\n"
-                "  - prompt (str): A natural language description of the event filters you wish to apply (e.g., 'Please give me the events of AIPI').\n"
-                "  - feed_type (str): The desired format for the returned data. Accepted values include 'rss', 'js', 'ics', 'csv', 'json', and 'jsonp'.\n"
-                "  - future_days (int): The number of days into the future for which to retrieve events (default is 45).\n"
-                "  - filter_method_group (bool): Defines filtering for organizer groups. If True, an event is included if it matches ANY specified group; "
-                "if False, it must match ALL specified groups.\n"
-                "  - filter_method_category (bool): Defines filtering for thematic categories. If True, an event is included if it matches ANY specified category; "
-                "if False, it must match ALL specified categories.\n\n"
-                "The tool returns the raw event data from Duke University's calendar API, or an error message if the API request fails."
-            )
+            args_schema=EventsArgs,
+            coroutine=aget_events_from_duke_api_single_input,
+            description=EVENTS_TOOL_DESCRIPTION
         ),
         Tool(
             name="get_curriculum_with_subject_from_duke_api",
             func=get_curriculum_with_subject_from_duke_api,
-            description=(
-                "Use this tool to retrieve curriculum information from Duke University's API."
-                "IMPORTANT: The 'subject' parameter must be from subjects.txt list. "
-                "Parameters:"
-                "   subject (str): The subject to get curriculum data for. For example, the subject is 'ARABIC-Arabic'."
-                "Return:"
-                "   str: Raw curriculum data in JSON format or an error message. If valid result, the response will contain each course's course id and course offer number for further queries."
-            )
+            args_schema=CurriculumArgs,
+            coroutine=aget_curriculum_with_subject_from_duke_api,
+            description=CURRICULUM_TOOL_DESCRIPTION
         ),
         Tool(
             name="get_detailed_course_information_from_duke_api",
             func=get_course_details_single_input,
-            description=(
-                "Use this tool to retrieve detailed curriculum information from Duke University's API. "
-                "You must provide both a valid course ID (course_id) and a course offer number (course_offer_number), "
-                "but **pass them as a single string** in the format 'course_id,course_offer_number'. "
-                "\n\nFor example:\n"
-                "  '027568,1' for course_id='027568' and course_offer_number='1'.\n\n"
-                "These parameters can be obtained from get_curriculum_with_subject_from_duke_api, which returns a list "
-                "of courses (each with a 'crse_id' and 'crse_offer_nbr').\n\n"
-                "Parameters:\n"
-                "  - course_id (str): The unique ID of the course, e.g. '029248'.\n"
-                "  - course_offer_number (str): The offer number for that course, e.g. '1'.\n\n"
-                "Return:\n"
-                "  - str: Raw curriculum data in JSON format, or an error message if something goes wrong."
-            )
+            args_schema=CourseDetailsArgs,
+            coroutine=aget_course_details_single_input,
+            description=COURSE_DETAILS_TOOL_DESCRIPTION
         ),
         Tool(
-            name="get_people_information_from_duke_api",
-            func=get_people_information_from_duke_api,
-            description=(
-                "Use this tool to retrieve people information from Duke University's API."
-                "Parameters:"
-                "   name (str): The name to get people data for. For example, the name is 'Brinnae Bent'."
-                "Return:"
-                "   str: Raw people data in JSON format or an error message."
-            )
+            name="get_detailed_courses_batch",
+            func=get_detailed_courses_batch,
+            args_schema=CoursesBatchArgs,
+            description=COURSES_BATCH_TOOL_DESCRIPTION
         ),
         Tool(
-            name="search_subject_by_code",
-            func=search_subject_by_code,
-            description=(
-                "Use this tool to find the correct format of a subject before using get_curriculum_with_subject_from_duke_api. "
-                "This tool handles case-insensitive matching and partial matches. "
-                "Example: 'cs' might return 'COMPSCI - Computer Science'. "
-                "Always use this tool first if you're uncertain about the exact subject format."
-            )
+            name="get_people_information_from_duke_api",
+            func=get_people_information_from_duke_api,
+            args_schema=PeopleArgs,
+            coroutine=aget_people_information_from_duke_api,
+            description=PEOPLE_TOOL_DESCRIPTION
         ),
         Tool(
-            name="search_group_format",
-            func=search_group_format,
-            description=(
-                "Use this tool to find the correct format of a group before using get_events_from_duke_api. "
-                "This tool handles case-insensitive matching and partial matches. "
-                "Example: 'data science' might return '+DataScience (+DS)'. "
-                "Always use this tool first if you're uncertain about the exact group format."
-            )
+            name="search_formats",
+            func=search_formats,
+            args_schema=SearchFormatsArgs,
+            description=SEARCH_FORMATS_TOOL_DESCRIPTION
         ),
         Tool(
-            name="search_category_format",
-            func=search_category_format,
-            description=(
-                "Use this tool to find the correct format of a category before using get_events_from_duke_api. "
-                "This tool handles case-insensitive matching and partial matches. "
-                "Example: 'ai' might return 'Artificial Intelligence'. "
-                "Always use this tool first if you're uncertain about the exact category format."
-            )
+            name="final_answer",
+            func=lambda text: text,
+            args_schema=FinalAnswerArgs,
+            return_direct=True,
+            description=FINAL_ANSWER_TOOL_DESCRIPTION
         ),
-        Tool(
-             name="PrattSearch",
-             func=lambda query: get_pratt_info_from_serpapi(
-                 query="Duke Pratt School of Engineering " + query, 
-                 api_key=serpapi_api_key,
-                 filter_domain=True  
-             ),
-             description=(
-                 "Use this tool to search for information about Duke Pratt School of Engineering. "
-                 "Specify your search query."
-             )
-         ),
     ]
+
+    # SerpAPI-backed web search is optional so deployments without a
+    # SERPAPI_API_KEY can run the same module with a reduced tool set
+    if include_pratt:
+        tools.append(
+            Tool(
+                name="PrattSearch",
+                args_schema=PrattSearchArgs,
+                func=lambda query: get_pratt_info_from_serpapi(
+                    query="Duke Pratt School of Engineering " + query,
+                    api_key=serpapi_api_key,
+                    filter_domain=True
+                ),
+                coroutine=apratt_search,
+                description=PRATT_SEARCH_TOOL_DESCRIPTION
+            )
+        )
+
+
+    # Fix the tool order so the serialized prefix is deterministic: LangChain
+    # renders tool names and descriptions into the request, and reordering
+    # them between runs would churn the otherwise cacheable prefix.
+    tools = sorted(tools, key=lambda tool: tool.name)
+
+    return tools
+
+# Compiled prompt template, built once per process. The system block is a
+# pre-rendered SystemMessage rather than a SystemMessagePromptTemplate, so
+# each agent step only substitutes {input} and splices in the history and
+# scratchpad instead of re-walking and re-formatting the 1 KB system text.
+_PROMPT = None
+
+def _get_chat_prompt():
+    global _PROMPT
+    if _PROMPT is None:
+        from langchain_core.messages import SystemMessage
+        from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, MessagesPlaceholder
+
+        _PROMPT = ChatPromptTemplate.from_messages([
+            SystemMessage(content=SYSTEM_PROMPT),
+            # Optional so memoryless executors (the batch path) can invoke
+            # the same compiled template without supplying a history
+            MessagesPlaceholder(variable_name="chat_history", optional=True),
+            HumanMessagePromptTemplate.from_template("{input}"),
+            MessagesPlaceholder(variable_name="agent_scratchpad")
+        ])
+    return _PROMPT
+
+def create_duke_agent(model="gpt-4o-mini", include_pratt=True, with_memory=True):
+    """
+    Create a LangChain agent with the Duke tools.
+    API keys are loaded from .env file.
+
+    Args:
+        model (str): The OpenAI chat model to drive the agent. Defaults to
+            gpt-4o-mini, which is much faster and cheaper than gpt-4o for
+            the tool-routing turns that dominate this agent's LLM calls
+            while still supporting parallel tool calling; pass gpt-4o for
+            maximum answer quality.
+        include_pratt (bool): Whether to include the SerpAPI-backed
+            PrattSearch tool. Pass False for deployments without a
+            SERPAPI_API_KEY, instead of maintaining a separate agent module.
+        with_memory (bool): Whether to attach conversation memory. Pass
+            False for executors shared by concurrent unrelated queries,
+            where one mutable history would interleave their turns.
+
+    Returns:
+        An initialized LangChain agent
+    """
+    # Deferred imports: see the note at the top of the module
+    from langchain.agents import create_tool_calling_agent
+    from langchain_openai import ChatOpenAI
+
+    from executor import ParallelToolAgentExecutor
+    from memory import PrefixStableMemory
+
+    # Get API keys from environment variables
+    openai_api_key = os.getenv("OPENAI_API_KEY")
     
-    # Create a memory instance
-    memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
+    # Check if API keys are available
+    if not openai_api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
     
-    # Initialize the LLM with the OpenAI API key
+    tools = create_duke_tools(include_pratt)
+
+    # Log a fingerprint of the static prefix once so accidental churn
+    # (edited descriptions, reordered tools) is easy to spot across runs.
+    prefix = SYSTEM_PROMPT + "".join(f"{tool.name}: {tool.description}" for tool in tools)
+    print(f"Prompt prefix hash: {hashlib.sha256(prefix.encode('utf-8')).hexdigest()[:12]}")
+
+    memory = None
+    if with_memory:
+        # Summarizer for rolling up old conversation turns; a small model
+        # keeps the summarization step cheap.
+        summary_llm = ChatOpenAI(
+            api_key=openai_api_key,
+            model_name="gpt-4o-mini",
+            temperature=0
+        )
+
+        # Create a memory instance. Append-only between resets so the
+        # provider's prompt-prefix cache keeps hitting; on overflow the
+        # history is rolled into one fresh summary message instead of
+        # trimming old turns in place.
+        memory = PrefixStableMemory(
+            llm=summary_llm,
+            max_token_limit=1500,
+            memory_key="chat_history",
+            return_messages=True
+        )
+    
+    # Initialize the LLM with the OpenAI API key. The 4o-family models
+    # support native (parallel) tool calling, so independent tool calls in
+    # one turn can be issued together instead of one at a time.
     llm = ChatOpenAI(
         api_key=openai_api_key,
-        model_name="gpt-4",
+        model_name=model,
         temperature=0
     )
     
-    # System prompt for agentic search approach
-    system_prompt = """
-    You are DukeBot, an authoritative and knowledgeable Duke University assistant with access to a suite of specialized Duke API tools. Your mission is to accurately and professionally provide information on three primary areas:
+    
+    # Use the precompiled chat prompt template
+    prompt = _get_chat_prompt()
 
-    1. **AI MEng Program Information**: Deliver detailed and reliable information about the AI MEng program. This includes curriculum details, admissions criteria, faculty expertise, career outcomes, and any unique features of the program.
+    # Build a tool-calling agent: unlike the serial ReAct loop, the model can
+    # return several tool calls in one turn and the executor runs them all
+    # before the next LLM round-trip (concurrently under ainvoke).
+    agent = create_tool_calling_agent(llm, tools, prompt)
+    agent_executor = ParallelToolAgentExecutor(
+        agent=agent,
+        tools=tools,
+        verbose=True,
+        memory=memory,
+        # Three iterations cover format search + API call + synthesis in this
+        # narrow domain; "force" stops without a final wrap-up LLM call.
+        max_iterations=3,
+        early_stopping_method="force",
+        max_execution_time=30,
+        handle_parsing_errors=True
+    )
 
-    2. **Prospective Student Information**: Provide factual and comprehensive information for prospective students about Duke University and Duke Pratt School of Engineering. Include key figures, campus life details, academic programs, admissions statistics, financial aid information, and notable achievements.
+    return agent_executor
 
-    3. **Campus Events**: Retrieve and present up-to-date information on events happening on campus. Ensure that events are filtered correctly by organizer groups and thematic categories.
+def create_duke_langgraph_agent(model="gpt-4o-mini", include_pratt=True):
+    """
+    Alternative factory that builds the Duke agent on LangGraph's prebuilt
+    ReAct graph instead of the classic AgentExecutor.
 
-    For every query, follow these steps:
+    The graph runtime skips the AgentExecutor callback layer and dispatches
+    parallel tool calls natively, which benchmarks meaningfully faster for
+    multi-tool turns. Conversation state lives in the checkpointer: pass
+    config={"configurable": {"thread_id": ...}} on invoke to keep per-user
+    history instead of sharing one memory object.
 
-    1. **THINK**:
-    - Carefully analyze the user’s query to determine which domain(s) it touches: AI MEng details, prospective student facts, or campus events.
-    - Decide which API tools are the best fit to get accurate data.
-    - If it is a general query, use the PrattSearch tool to find relevant information first, then use the specialized tools for specific details.
+    Requires the optional langgraph package; the AgentExecutor path in
+    create_duke_agent remains the default used by process_user_query.
 
-    2. **FORMAT SEARCH**:
-    - NEVER pass user-provided subject, group, or category formats directly to the API tools.
-    - Use the dedicated search functions (e.g., search_subject_by_code, search_group_format, search_category_format) to find and confirm the correct, official formats for any subjects, groups, or categories mentioned.
-    - If the query includes ambiguous or multiple potential matches, ask the user for clarification or select the most likely candidate.
-
-    3. **ACT**:
-    - Once you have validated and formatted all input parameters, execute the correct API call(s) using the specialized Duke API tools.
-    - For example, use the "get_duke_events" tool for event queries or the appropriate tool for retrieving AI MEng program details or prospective student information.
+    Args:
+        model (str): The OpenAI chat model to drive the agent.
+        include_pratt (bool): Whether to include the PrattSearch tool.
 
-    4. **OBSERVE**:
-    - Analyze and verify the data returned from the API tools.
-    - Check that the returned results align with the user’s query and that all required formatting is correct.
+    Returns:
+        A compiled LangGraph agent.
+    """
+    from langchain_openai import ChatOpenAI
+    from langgraph.checkpoint.memory import MemorySaver
+    from langgraph.prebuilt import create_react_agent
 
-    5. **RESPOND**:
-    - Synthesize the fetched data into a clear, concise, and helpful response. Your answer should be accurate, professional, and tailored to the query’s focus (whether program details, key facts and figures, or event listings).
-    - Do not mention internal formatting or search corrections unless necessary to help the user understand any issues.
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    if not openai_api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
 
-    Remember:
-    - Never bypass input validation: always convert user input into the official formats through your search tools before calling an API.
-    - If there is uncertainty or multiple matches, ask the user to clarify rather than guessing.
-    - Your responses should reflect Duke University's excellence and the specialized capabilities of Duke Pratt School of Engineering.
-    - If you call a tool, always check the input format and pass the correct arguments to the tool.
+    tools = create_duke_tools(include_pratt)
+    llm = ChatOpenAI(
+        api_key=openai_api_key,
+        model_name=model,
+        temperature=0
+    )
 
-    By following these steps, you ensure every query about the AI MEng program, prospective student information, or campus events is handled precisely and professionally.
-    """
-    
-    # Create a proper chat prompt template
-    prompt = ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate.from_template(system_prompt),
-        MessagesPlaceholder(variable_name="chat_history"),
-        HumanMessagePromptTemplate.from_template("{input}")
-    ])
-    
-    # Initialize the agent with the correct prompt
-    agent = initialize_agent(
-        tools,
+    return create_react_agent(
         llm,
-        agent=AgentType.CHAT_CONVERSATIONAL_REACT_DESCRIPTION,
-        verbose=True,
-        memory=memory,
-        max_iterations=5,
-        early_stopping_method="generate",
-        handle_parsing_errors=True,
-        prompt=prompt  # Use the properly formatted prompt
+        tools=tools,
+        state_modifier=SYSTEM_PROMPT,
+        checkpointer=MemorySaver()
     )
-    
-    return agent
+
+# Cache the agent across queries so the heavy LangChain wiring (LLM client,
+# tools, prompt, memory) is only built once per process. This also keeps
+# ConversationBufferMemory alive between calls, so multi-turn context works.
+_AGENT = None
+_AGENT_LOCK = threading.Lock()
+
+def get_duke_agent():
+    """
+    Return the shared Duke agent, creating it on first use.
+    Returns:
+        The cached LangChain agent instance.
+    """
+    global _AGENT
+    if _AGENT is None:
+        with _AGENT_LOCK:
+            if _AGENT is None:
+                _AGENT = create_duke_agent()
+    return _AGENT
+
+# Separate memoryless executor for the concurrent batch path. The shared
+# agent's memory is a single mutable history: concurrent ainvoke calls
+# through it would interleave unrelated turns into one conversation and
+# race inside save_context. Without memory the executor holds no per-query
+# state, so one instance can serve a whole batch safely.
+_BATCH_AGENT = None
+
+def get_batch_duke_agent():
+    """
+    Return the shared memoryless Duke agent used for concurrent batches,
+    creating it on first use.
+    Returns:
+        The cached memoryless LangChain agent instance.
+    """
+    global _BATCH_AGENT
+    if _BATCH_AGENT is None:
+        with _AGENT_LOCK:
+            if _BATCH_AGENT is None:
+                _BATCH_AGENT = create_duke_agent(with_memory=False)
+    return _BATCH_AGENT
+
+# Router thresholds: route directly to a tool only when the best match is
+# both strong and clearly ahead of the runner-up; otherwise fall back to the
+# full agent, which can plan multi-step answers.
+ROUTER_SCORE_THRESHOLD = 0.45
+ROUTER_SCORE_MARGIN = 0.05
+
+# Only tools whose func genuinely accepts free-form natural language may be
+# routing targets. The rest take strict machine formats (comma-split event
+# args, exact subject strings, 'id,nbr' pairs, JSON objects), and handing
+# them the raw user text bypasses the system prompt's format-validation
+# invariant and fails downstream.
+ROUTER_CANDIDATE_TOOLS = frozenset({
+    "PrattSearch",
+    "get_people_information_from_duke_api",
+})
+
+# Tool embeddings are computed once per process, lazily on first routing
+_TOOL_EMBEDDINGS = None
+
+def _cosine_similarity(a, b):
+    """
+    Compute the cosine similarity between two embedding vectors.
+    """
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = math.sqrt(sum(x * x for x in a))
+    norm_b = math.sqrt(sum(x * x for x in b))
+    if norm_a == 0 or norm_b == 0:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+def route_query_to_tool(query):
+    """
+    Try to map a query directly to a single tool, skipping the agent loop.
+
+    Embeds the tool descriptions once per process, then compares the query
+    embedding against them. Only routes when the top match clears
+    ROUTER_SCORE_THRESHOLD and beats the runner-up by ROUTER_SCORE_MARGIN,
+    so ambiguous or multi-step queries still go through the full agent.
+
+    Args:
+        query (str): The user query to route.
+    Returns:
+        The matched Tool, or None if no single tool is a clear match.
+    """
+    from tools import get_embedding
+
+    global _TOOL_EMBEDDINGS
+    duke_agent = get_duke_agent()
+    if _TOOL_EMBEDDINGS is None:
+        # return_direct tools are excluded even if the allowlist grows:
+        # routing to final_answer (func=lambda text: text) would echo the
+        # user's query back verbatim as the "answer"
+        _TOOL_EMBEDDINGS = [
+            (tool, get_embedding(tool.description))
+            for tool in duke_agent.tools
+            if tool.name in ROUTER_CANDIDATE_TOOLS and not tool.return_direct
+        ]
+    if not _TOOL_EMBEDDINGS:
+        return None
+
+    query_embedding = get_embedding(query)
+    scored = [
+        (tool, _cosine_similarity(query_embedding, embedding))
+        for tool, embedding in _TOOL_EMBEDDINGS
+    ]
+    scored.sort(key=lambda x: x[1], reverse=True)
+
+    top_tool, top_score = scored[0]
+    runner_up_score = scored[1][1] if len(scored) > 1 else 0.0
+    if top_score >= ROUTER_SCORE_THRESHOLD and top_score - runner_up_score >= ROUTER_SCORE_MARGIN:
+        return top_tool
+    return None
 
 def process_user_query(query):
     """
@@ -227,12 +590,28 @@ def process_user_query(query):
         query (str): The user query to process.
     Returns:
         str: The response from the agent.
-    
+
     """
     try:
-        # Create the agent
-        duke_agent = create_duke_agent()
-        
+        # Reuse the shared agent instead of rebuilding it per query
+        duke_agent = get_duke_agent()
+
+        # Fast path: if one tool clearly matches, call it directly and skip
+        # the agent's extra LLM round-trip for single-tool queries.
+        try:
+            routed_tool = route_query_to_tool(query)
+        except Exception as e:
+            print(f"Router unavailable, falling back to agent: {str(e)}")
+            routed_tool = None
+        if routed_tool is not None:
+            print(f"Routing query directly to tool: {routed_tool.name}")
+            result = routed_tool.func(query)
+            # Routed turns must still land in chat history, or follow-up
+            # questions through the agent lose this exchange entirely
+            if duke_agent.memory is not None:
+                duke_agent.memory.save_context({"input": query}, {"output": result})
+            return result
+
         # Process the query using invoke
         response = duke_agent.invoke({"input": query})
         
@@ -242,6 +621,67 @@ def process_user_query(query):
         print(f"Error processing query: {str(e)}")
         return f"An error occurred: {str(e)}"
 
+def stream_user_query(query):
+    """
+    Stream the agent's progress and answer for a query as it is produced.
+
+    AgentExecutor.stream emits one chunk per agent step: the tool calls
+    the model planned, then their results, then the final answer. The
+    answer text itself arrives in a single final chunk, so this yields a
+    short progress notice per tool call followed by the answer — callers
+    (CLI, Streamlit, or a web framework's streaming response) can show
+    what the agent is doing while it works instead of a spinner until the
+    run ends. Token-level streaming of the answer would need
+    astream_events on the underlying LLM.
+
+    Args:
+        query (str): The user query to process.
+    Yields:
+        str: Progress notices (one per tool call), then the final answer.
+    """
+    try:
+        duke_agent = get_duke_agent()
+        for chunk in duke_agent.stream({"input": query}):
+            for action in chunk.get("actions", []):
+                yield f"[calling {action.tool}...]\n"
+            output = chunk.get("output", "")
+            if output:
+                yield output
+    except Exception as e:
+        print(f"Error processing query: {str(e)}")
+        yield f"An error occurred: {str(e)}"
+
+async def process_user_queries_batch(queries, max_concurrency=5):
+    """
+    Process several independent user queries concurrently.
+
+    Each query is awaited through a memoryless executor's ainvoke, so the
+    OpenAI and Duke API round-trips overlap instead of running back to
+    back. The queries are independent, so no conversation memory is
+    attached: sharing the conversational agent's single history across
+    in-flight queries would interleave unrelated turns. A semaphore bounds
+    in-flight requests to stay under provider rate limits.
+
+    Args:
+        queries (list[str]): The user queries to process.
+        max_concurrency (int): Maximum number of queries in flight at once.
+    Returns:
+        list[str]: The agent's response for each query, in input order.
+    """
+    duke_agent = get_batch_duke_agent()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def process_one(query):
+        async with semaphore:
+            try:
+                response = await duke_agent.ainvoke({"input": query})
+                return response.get("output", "I couldn't process your request at this time.")
+            except Exception as e:
+                print(f"Error processing query: {str(e)}")
+                return f"An error occurred: {str(e)}"
+
+    return await asyncio.gather(*(process_one(query) for query in queries))
+
 def main():
     # Test queries that demonstrate format compatibility
     test_queries = [
@@ -258,9 +698,11 @@ def main():
         "Tell me something about Pratt School of Engineering at Duke",
     ]
     
-    for query in test_queries:
+    # Run the independent test queries concurrently instead of one by one
+    responses = asyncio.run(process_user_queries_batch(test_queries))
+
+    for query, response in zip(test_queries, responses):
         print(f"\nQuery: {query}")
-        response = process_user_query(query)
         print(f"Response: {response}")
         print("-" * 80)
 
@@ -0,0 +1,66 @@
+# memory.py
+from typing import Any
+
+from langchain.memory.chat_memory import BaseChatMemory
+from langchain_core.messages import SystemMessage, get_buffer_string
+
+
+class PrefixStableMemory(BaseChatMemory):
+    """
+    Append-only conversation memory that preserves provider prompt caching.
+
+    Prefix caches only hit while every earlier message is byte-identical, so
+    memories that trim or rewrite the oldest turn on every call invalidate
+    the cache each turn. This memory never mutates past messages: each turn
+    is appended, and only when the history exceeds max_token_limit is the
+    whole buffer reset to one fresh summary message plus the last few turns.
+    Between resets the prefix grows strictly by appending, so cache hits
+    survive; each reset bumps cache_version and logs it so prefix churn is
+    observable.
+    """
+
+    llm: Any
+    memory_key: str = "chat_history"
+    max_token_limit: int = 1500
+    keep_last_messages: int = 4
+    cache_version: int = 0
+
+    @property
+    def memory_variables(self) -> list:
+        return [self.memory_key]
+
+    def load_memory_variables(self, inputs: dict) -> dict:
+        messages = self.chat_memory.messages
+        if self.return_messages:
+            return {self.memory_key: messages}
+        return {self.memory_key: get_buffer_string(messages)}
+
+    def save_context(self, inputs: dict, outputs: dict) -> None:
+        # Append the new turn (never mutate earlier messages), then reset
+        # wholesale if the buffer has outgrown the token limit
+        super().save_context(inputs, outputs)
+        self._reset_if_over_limit()
+
+    def _reset_if_over_limit(self) -> None:
+        messages = self.chat_memory.messages
+        if self.llm.get_num_tokens_from_messages(messages) <= self.max_token_limit:
+            return
+
+        keep = messages[-self.keep_last_messages:]
+        to_summarize = messages[:-self.keep_last_messages]
+        if not to_summarize:
+            return
+
+        summary = self.llm.invoke(
+            "Condense the following conversation into a short summary that "
+            "preserves every fact, name, and preference the assistant may "
+            "need later:\n\n" + get_buffer_string(to_summarize)
+        ).content
+
+        # Replace the buffer with a brand-new prefix rather than editing the
+        # old one in place
+        self.chat_memory.messages = [
+            SystemMessage(content=f"Summary of the earlier conversation: {summary}")
+        ] + list(keep)
+        self.cache_version += 1
+        print(f"Conversation memory reset into a new prefix; cache_version={self.cache_version}")
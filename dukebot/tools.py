@@ -1,11 +1,22 @@
 # tools.py
 from urllib.parse import quote
-from langchain.tools import Tool
+import bisect
+import re
+import asyncio
+import httpx
 import requests
 import json
 from dotenv import load_dotenv
 import os
-from rapidfuzz import fuzz
+import functools
+import ijson
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from cachetools import TTLCache
+from rapidfuzz import fuzz, process
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 from openai import OpenAI
 
 load_dotenv()
@@ -13,28 +24,186 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 model_client = OpenAI(api_key=OPENAI_API_KEY)
 
+# orjson parses and serializes a few times faster than the stdlib json and
+# matters on the multi-hundred-KB course arrays these tools shuffle around.
+# Fall back to the stdlib when it is not installed.
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+# Shared HTTP session so repeated API calls reuse pooled TCP/TLS connections
+# instead of paying a fresh handshake per request. HTTPAdapter's pool is
+# thread-safe, so the parallel tool paths can share it. Transient 5xx and
+# connection failures are retried at the urllib3 layer with exponential
+# backoff (0.3s, 0.6s, 1.2s) so a flaky upstream costs a short pause, not
+# a failed tool call; retries stay GET-only since every call here is one.
+_retry_policy = requests.adapters.Retry(
+    total=3,
+    backoff_factor=0.3,
+    status_forcelist=(500, 502, 503, 504),
+    allowed_methods=frozenset(['GET']),
+)
+_session = requests.Session()
+_session.mount('https://', requests.adapters.HTTPAdapter(
+    pool_connections=4, pool_maxsize=32, max_retries=_retry_policy))
+
+# Ask for compressed bodies explicitly: gzip over calendar JSON is typically
+# 5-10x smaller and urllib3 decompresses transparently. Brotli is only
+# advertised when the decoder is actually installed.
+try:
+    import brotli  # noqa: F401
+    _session.headers['Accept-Encoding'] = 'gzip, deflate, br'
+except ImportError:
+    _session.headers['Accept-Encoding'] = 'gzip, deflate'
+
+# Upper bound on the decompressed body size kept from any fetch; anything
+# larger is truncated so one oversized payload cannot balloon the agent
+# context (or the validator cache).
+_MAX_RESPONSE_BYTES = 1 << 20
+
+# Duke streamer API credentials and base URL. The historical literal stays
+# as the default so existing deployments keep working, but the token can be
+# rotated via the environment instead of editing URL strings.
+_STREAMER_BASE = 'https://streamer.oit.duke.edu'
+DUKE_API_TOKEN = os.getenv('DUKE_API_TOKEN', '19d3636f71c152dd13840724a8a48074')
+# Sent via params= so the token is appended once by urllib3 rather than
+# re-concatenated into every URL f-string (and never sent to non-Duke hosts).
+_DUKE_API_PARAMS = {'access_token': DUKE_API_TOKEN}
+
+# (connect, read) timeout applied to every request through the session
+_REQUEST_TIMEOUT = (3, 10)
+
+# quote() runs every character through its escape table even when nothing
+# needs escaping. Subject codes and most names are plain ASCII, so a cheap
+# precompiled scan for any non-unreserved character skips that work.
+_needs_quote = re.compile(r'[^A-Za-z0-9._~-]').search
+
+def _fast_quote(value: str) -> str:
+    """
+    Return value unchanged when it only contains URL-unreserved characters;
+    otherwise fall back to full percent-encoding.
+    """
+    return value if not _needs_quote(value) else quote(value, safe="")
+
+
 # Define the tools
 def load_options_from_file(filename):
     """
     Load valid options from a text file, where each line is an option.
+
+    The whole file is read in one shot and split with the C-level
+    splitlines() rather than iterating the file object line by line, so
+    startup cost is a single read plus one newline scan.
     Args:
         filename (str): Path to the text file containing valid options.
     Returns:
         list: List of valid options.
     """
-    with open(filename, 'r') as file:
-        return [line.strip() for line in file]
+    with open(filename, 'rb') as file:
+        lines = file.read().decode('utf-8', 'ignore').splitlines()
+    return [line.strip() for line in lines if line.strip()]
     
-# Try to load the valid options
-try:
-    valid_groups = load_options_from_file('resources/groups.txt')
-    valid_categories = load_options_from_file('resources/categories.txt')
-    valid_subjects = load_options_from_file('resources/subjects.txt')
-except FileNotFoundError as e:
-    print(f"Warning: Could not load options file: {e}")
-    valid_groups = []
-    valid_categories = []
-    valid_subjects = []
+# The valid-option lists are loaded lazily: no file is touched at import
+# time, each one is read at most once on first use, and a missing file
+# degrades to an empty list as before.
+_OPTION_FILES = {
+    'valid_groups': 'resources/groups.txt',
+    'valid_categories': 'resources/categories.txt',
+    'valid_subjects': 'resources/subjects.txt',
+}
+
+@functools.cache
+def _load_options(name: str) -> list:
+    """
+    Load (and memoize) one of the valid-option lists by its attribute name.
+    """
+    try:
+        return load_options_from_file(_OPTION_FILES[name])
+    except FileNotFoundError as e:
+        print(f"Warning: Could not load options file: {e}")
+        return []
+
+def __getattr__(name):
+    # PEP 562: keep `tools.valid_groups` etc. working for importers while
+    # deferring the file read until the attribute is first accessed
+    if name in _OPTION_FILES:
+        return _load_options(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Lowercase indexes so each search does cheap comparisons against
+# already-lowercased strings instead of re-lowercasing every option per
+# call. Built lazily on first search and memoized thereafter.
+@functools.cache
+def _get_subject_index() -> list:
+    index = []
+    for subject in _load_options('valid_subjects'):
+        parts = subject.split(' - ')
+        if len(parts) >= 2:
+            code = parts[0].strip().lower()
+            name = parts[1].strip().lower()
+            index.append((code, code.replace('-', '').replace(' ', ''), name, subject))
+    return index
+
+def _build_scan_blob(values: list) -> tuple:
+    """
+    Join lowercased values into one newline-separated blob plus the start
+    offset of each entry. Substring search over the blob runs inside the
+    regex engine (a C-level scan) instead of a Python-level loop of `in`
+    tests, and a match position maps back to its entry via bisect.
+    """
+    lower = [value.lower() for value in values]
+    starts = []
+    position = 0
+    for value in lower:
+        starts.append(position)
+        position += len(value) + 1  # +1 for the newline separator
+    return "\n".join(lower), starts
+
+@functools.cache
+def _get_scan_blob(name: str) -> tuple:
+    """
+    Memoized (blob, starts) pair for one of the valid-option lists.
+    """
+    return _build_scan_blob(_load_options(name))
+
+def _scan_blob(query_lower: str, blob: str, starts: list, originals: list, limit: int = 5) -> list:
+    """
+    Find up to `limit` entries whose lowercased text contains query_lower,
+    preserving entry order and stopping as soon as the limit is reached.
+    """
+    matches = []
+    seen = set()
+    for match in re.finditer(re.escape(query_lower), blob):
+        index = bisect.bisect_right(starts, match.start()) - 1
+        if index not in seen:
+            seen.add(index)
+            matches.append(originals[index])
+            if len(matches) >= limit:
+                break
+    return matches
+
+def get_embedding(text: str) -> list:
+    """
+    Compute an embedding vector for a piece of text using OpenAI's
+    text-embedding-3-small model.
+    Args:
+        text (str): The text to embed.
+    Returns:
+        list: The embedding vector as a list of floats.
+    """
+    response = model_client.embeddings.create(
+        model="text-embedding-3-small",
+        input=text
+    )
+    return response.data[0].embedding
 
 def filter_candidates(query: str, candidates: list, top_n: int = 10) -> list:
     """
@@ -60,15 +229,19 @@ def load_valid_values(filename: str) -> list:
         # Remove empty lines and strip whitespace
         return [line.strip() for line in f if line.strip()]
 
+@functools.cache
 def load_valid_groups():
     """
-    Load valid groups from the groups.txt file.
+    Load valid groups from the groups.txt file. Cached so repeated calls
+    don't re-read the file.
     """
     return load_valid_values("resources/groups.txt")
 
+@functools.cache
 def load_valid_categories():
     """
-    Load valid categories from the categories.txt file.
+    Load valid categories from the categories.txt file. Cached so repeated
+    calls don't re-read the file.
     """
     return load_valid_values("resources/categories.txt")
 
@@ -127,8 +300,10 @@ def llm_map_prompt_to_filters(prompt: str):
 
     try:
         # Call the LLM with the system and user prompts
+        # A small model is plenty for this constrained mapping task and is
+        # roughly an order of magnitude faster and cheaper than gpt-4
         response = model_client.chat.completions.create(
-            model="gpt-4",
+            model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
@@ -149,6 +324,104 @@ def llm_map_prompt_to_filters(prompt: str):
 
     return groups, categories
 
+# TTL caches for the Duke API tools, keyed by canonicalized arguments, so
+# repeated queries skip the network entirely while results are still fresh.
+# TTLs reflect how quickly each endpoint's data changes.
+_events_cache = TTLCache(maxsize=256, ttl=300)        # events: 5 minutes
+_curriculum_cache = TTLCache(maxsize=256, ttl=86400)  # curriculum: 24 hours
+_people_cache = TTLCache(maxsize=256, ttl=3600)       # people: 1 hour
+
+# TTLCache mutation is not thread-safe and tools may run from a thread pool,
+# so all cache reads/writes go through this lock. The network fetch itself
+# stays outside the lock to keep misses concurrent.
+_cache_lock = threading.Lock()
+
+def _cache_key(name: str, arg: str) -> tuple:
+    """
+    Build a cache key from a tool name and its single string argument,
+    canonicalized so trivially different spellings share an entry.
+    """
+    return (name, str(arg).strip().lower())
+
+def _cacheable(value: str) -> bool:
+    """
+    Only successful responses are worth keeping; error strings should be
+    retried on the next call.
+    """
+    return not value.startswith(("Failed to fetch", "Error"))
+
+def cached_tool(cache):
+    """
+    Decorator that memoizes a single-string-argument tool function in the
+    given TTL cache.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(arg):
+            key = _cache_key(fn.__name__, arg)
+            with _cache_lock:
+                if key in cache:
+                    return cache[key]
+            value = fn(arg)
+            if _cacheable(value):
+                with _cache_lock:
+                    cache[key] = value
+            return value
+        return wrapper
+    return decorator
+
+# Validator cache for HTTP conditional GETs: url -> (etag, last_modified,
+# body). When the in-process TTL cache has expired but the origin's data has
+# not changed, revalidation turns a potentially multi-hundred-KB transfer
+# into a few-hundred-byte 304.
+_validator_cache = {}
+_VALIDATOR_CACHE_MAX = 64
+
+def _conditional_get(url: str, params: dict = None) -> tuple:
+    """
+    GET a URL with ETag / If-Modified-Since revalidation.
+
+    Returns (status_code, text). A 304 is resolved against the validator
+    cache and reported as a 200 with the cached body, so callers treat
+    revalidated responses exactly like fresh ones.
+    """
+    with _cache_lock:
+        cached = _validator_cache.get(url)
+    headers = {}
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+    response = _session.get(url, params=params, headers=headers or None, timeout=_REQUEST_TIMEOUT)
+
+    if response.status_code == 304 and cached:
+        return 200, cached[2]
+    if response.status_code != 200:
+        return response.status_code, ""
+
+    if len(response.content) > _MAX_RESPONSE_BYTES:
+        response.encoding = 'utf-8'  # skip charset sniffing
+        return 200, (response.text[:_MAX_RESPONSE_BYTES]
+                     + "\n[response truncated: payload exceeded size limit]")
+
+    response.encoding = 'utf-8'  # skip charset sniffing
+    body = response.text
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if etag or last_modified:
+        with _cache_lock:
+            if url not in _validator_cache and len(_validator_cache) >= _VALIDATOR_CACHE_MAX:
+                _validator_cache.pop(next(iter(_validator_cache)))
+            _validator_cache[url] = (etag, last_modified, body)
+    return 200, body
+
+# Feed types the calendar API serves natively; any other feed_type needs
+# the feed_type=simple query parameter. Frozenset for O(1) membership.
+_RAW_FEED_TYPES = frozenset({'rss', 'js', 'ics', 'csv'})
+
 def events_from_duke_api(feed_type: str = "json",
                              future_days: int = 45,
                              groups: list = ['All'],
@@ -180,55 +453,34 @@ def events_from_duke_api(feed_type: str = "json",
     Returns:
         str: Raw calendar data (e.g., in JSON, XML, or ICS format) or an error message.
     """
-    
-    # When feed_type is not one of these types, add the simple feed_type parameter.
-    feed_type_param = ""
-    if feed_type not in ['rss', 'js', 'ics', 'csv']:
-        feed_type_param = "feed_type=simple"
-    
-    # If feed_type is not one of these types, add the simple feed_type parameter.
-    feed_type_url = feed_type_param if feed_type_param else ""
+    # Feed types with their own native format skip the simple feed_type
+    # parameter; everything else gets it appended as a suffix.
+    suffix = '' if feed_type in _RAW_FEED_TYPES else '&feed_type=simple'
 
-    # If the filter_method_group is True, then the group_url is empty.
-    if filter_method_group:
-        if 'All' in groups:
-            group_url = ""
-        else:
-            group_url = ""
-            for group in groups:
-                group_url+='&gfu[]='+quote(group, safe="")
+    # The four near-identical branches only differed in the parameter name
+    # (OR matching uses gfu[]/cfu[], AND matching gf[]/cf[]); a single join
+    # per filter builds the query string in one linear concatenation.
+    group_param = '&gfu[]=' if filter_method_group else '&gf[]='
+    if 'All' in groups:
+        group_url = ""
     else:
-        if 'All' in groups:
-            group_url = ""
-        else:
-            group_url = "&gf[]=" + quote(groups[0], safe="")
-            for group in groups[1:]:
-                group_url += "&gf[]=" + quote(group, safe="")
+        group_url = "".join(group_param + _fast_quote(group) for group in groups)
 
-    if filter_method_category:
-        if 'All' in categories:
-            category_url = ""
-        else:
-            category_url = ""
-            for category in categories:
-                category_url += '&cfu[]=' + quote(category, safe="")
+    category_param = '&cfu[]=' if filter_method_category else '&cf[]='
+    if 'All' in categories:
+        category_url = ""
     else:
-        if 'All' in categories:
-            category_url = ""
-        else:
-            category_url = ""
-            for category in categories:
-                category_url += "&cf[]=" + quote(category, safe="")
+        category_url = "".join(category_param + _fast_quote(category) for category in categories)
 
-    url = f'https://calendar.duke.edu/events/index.{feed_type}?{category_url}{group_url}&future_days={future_days}&{feed_type_url}'
+    url = f'https://calendar.duke.edu/events/index.{feed_type}?future_days={future_days}{category_url}{group_url}{suffix}'
 
-    response = requests.get(url)
+    status, body = _conditional_get(url)
 
-    if response.status_code == 200:
-        return response.text[:1000]
+    if status == 200:
+        return body[:1000]
     else:
-        return f"Failed to fetch data: {response.status_code}"
-    
+        return f"Failed to fetch data: {status}"
+
 def get_events_from_duke_api(prompt: str,
                                    feed_type: str = "json",
                                    future_days: int = 45,
@@ -273,6 +525,7 @@ def get_events_from_duke_api(prompt: str,
         filter_method_category=filter_method_category
     )
 
+@cached_tool(_events_cache)
 def get_events_from_duke_api_single_input(arg_str: str) -> str:
     """
     A wrapper that parses a single comma-separated string input and calls
@@ -331,6 +584,34 @@ def get_events_from_duke_api_single_input(arg_str: str) -> str:
     )
 
 
+class _ResponseReader:
+    """
+    Minimal file-like adapter over response.iter_content so ijson can stream
+    a requests response (iter_content also handles transfer decompression,
+    which reading response.raw directly would not).
+    """
+    def __init__(self, response, chunk_size=16384):
+        self._chunks = response.iter_content(chunk_size=chunk_size)
+        self._buffer = b""
+
+    def push_back(self, data: bytes):
+        """Return already-read bytes to the front of the stream."""
+        self._buffer = data + self._buffer
+
+    def read(self, size=-1) -> bytes:
+        if size < 0:
+            out = self._buffer + b"".join(self._chunks)
+            self._buffer = b""
+            return out
+        while len(self._buffer) < size:
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                break
+        out, self._buffer = self._buffer[:size], self._buffer[size:]
+        return out
+
+@cached_tool(_curriculum_cache)
 def get_curriculum_with_subject_from_duke_api(subject: str):
     """
     Retrieve curriculum information from Duke University's API by specifying a subject code.
@@ -340,31 +621,49 @@ def get_curriculum_with_subject_from_duke_api(subject: str):
     Returns:
         str: Raw curriculum data in JSON format or an error message.
     """
-    subject_url = quote(subject, safe="")
-    url = f'https://streamer.oit.duke.edu/curriculum/courses/subject/{subject_url}?access_token=19d3636f71c152dd13840724a8a48074'
-    
-    response = requests.get(url)
-    
-    if response.status_code == 200:
-        try:
-            # Parse the JSON response
-            data = json.loads(response.text)
-            
-            # Limit the number of courses returned (e.g., first 5)
-            if isinstance(data, list) and len(data) > 5:
-                limited_data = data[:5]
+    subject_url = _fast_quote(subject)
+    url = f'{_STREAMER_BASE}/curriculum/courses/subject/{subject_url}'
+
+    response = _session.get(url, params=_DUKE_API_PARAMS, stream=True, timeout=_REQUEST_TIMEOUT)
+
+    if response.status_code != 200:
+        response.close()
+        return f"Failed to fetch data: {response.status_code}"
+
+    try:
+        reader = _ResponseReader(response)
+
+        # Peek at the first non-whitespace byte: a top-level array takes the
+        # streaming fast path, anything else falls back to raw text
+        head = reader.read(1)
+        while head and head.isspace():
+            head = reader.read(1)
+
+        if head == b"[":
+            reader.push_back(head)
+            # Stream the array: only the first 5 courses are materialized as
+            # Python objects; the rest are just counted, so a multi-hundred-KB
+            # payload never needs a full parse into memory at once
+            items = ijson.items(reader, 'item', use_float=True)
+            limited_data = list(islice(items, 5))
+            total = len(limited_data) + sum(1 for _ in items)
+
+            if total > 5:
                 # Add a note about limiting the results
                 limited_response = {
                     "courses": limited_data,
-                    "note": f"Showing 5 out of {len(data)} courses. Use more specific queries to refine results."
+                    "note": f"Showing 5 out of {total} courses. Use more specific queries to refine results."
                 }
-                return json.dumps(limited_response)
+                return _json_dumps(limited_response)
             else:
-                return response.text[:1000]
-        except json.JSONDecodeError:
-            return "Error: Could not parse API response"
-    else:
-        return f"Failed to fetch data: {response.status_code}"
+                return _json_dumps(limited_data)[:1000]
+        else:
+            text = (head + reader.read(-1)).decode(response.encoding or "utf-8", errors="replace")
+            return text[:1000]
+    except (ijson.JSONError, json.JSONDecodeError):
+        return "Error: Could not parse API response"
+    finally:
+        response.close()
     
 def get_detailed_course_information_from_duke_api(course_id: str, course_offer_number: str):
     """
@@ -378,14 +677,15 @@ def get_detailed_course_information_from_duke_api(course_id: str, course_offer_n
         str: Raw curriculum data in JSON format or an error message.
     """
 
-    url = f'https://streamer.oit.duke.edu/curriculum/courses/crse_id/{course_id}/crse_offer_nbr/{course_offer_number}?access_token=19d3636f71c152dd13840724a8a48074'
-    response = requests.get(url)
+    url = f'{_STREAMER_BASE}/curriculum/courses/crse_id/{course_id}/crse_offer_nbr/{course_offer_number}'
+    status, body = _conditional_get(url, params=_DUKE_API_PARAMS)
 
-    if response.status_code == 200:
-        return response.text
+    if status == 200:
+        return body
     else:
-        return f"Failed to fetch data: {response.status_code}"
+        return f"Failed to fetch data: {status}"
 
+@cached_tool(_curriculum_cache)
 def get_course_details_single_input(arg_str: str) -> str:
     # Expect a single string in the format "course_id,course_offer_number", e.g. "027568,1"
     try:
@@ -395,7 +695,34 @@ def get_course_details_single_input(arg_str: str) -> str:
         return get_detailed_course_information_from_duke_api(course_id, course_offer_number)
     except ValueError:
         return "Error: Please provide input in the form 'course_id,course_offer_number'"
-    
+
+def get_detailed_courses_batch(arg_str: str) -> str:
+    """
+    Retrieve detailed information for several courses in one call.
+
+    Expected input format: semicolon-separated 'course_id,course_offer_number'
+    pairs, e.g. '027568,1; 029248,1'.
+
+    The lookups are independent network-bound GETs, so they are fanned out to
+    a thread pool and overlap instead of running back to back; results come
+    back in input order. Each lookup goes through the cached single-course
+    fetch, so repeats are free.
+
+    Returns:
+        str: JSON array with one raw course result per input pair, or an
+        error message if no valid pairs were provided.
+    """
+    pairs = [part.strip() for part in arg_str.split(";") if part.strip()]
+    if not pairs:
+        return "Error: Provide one or more 'course_id,course_offer_number' pairs separated by semicolons."
+
+    with ThreadPoolExecutor(max_workers=min(len(pairs), 8)) as pool:
+        results = list(pool.map(get_course_details_single_input, pairs))
+
+    return _json_dumps(results)
+
+
+@cached_tool(_people_cache)
 def get_people_information_from_duke_api(name: str):
     """
     Retrieve people information from Duke University's API by specifying a name, allowing you to access detailed information about a specific person.
@@ -407,16 +734,158 @@ def get_people_information_from_duke_api(name: str):
         str: Raw people data in JSON format or an error message.
     """
 
-    name_url = quote(name, safe="")
+    name_url = _fast_quote(name)
+
+    url = f'{_STREAMER_BASE}/ldap/people?q={name_url}'
+
+    status, body = _conditional_get(url, params=_DUKE_API_PARAMS)
+
+    if status == 200:
+        return body
+    else:
+        return f"Failed to fetch data: {status}"
+
+def _fuzzy_matches(query: str, candidates: list, limit: int = 5, score_cutoff: int = 70) -> list:
+    """
+    Return the best fuzzy matches for a query from a candidate list.
+    Used as a fallback when exact substring matching finds nothing.
+    """
+    results = process.extract(query, candidates, scorer=fuzz.WRatio,
+                              limit=limit, score_cutoff=score_cutoff)
+    return [candidate for candidate, score, index in results]
+
+# Shared async HTTP clients so parallel tool calls reuse pooled TLS/TCP
+# connections instead of paying a new handshake per request. An AsyncClient's
+# pooled connections bind to the event loop that first used it, so the cache
+# is keyed by the running loop: a second asyncio.run() in the same process
+# gets a fresh client instead of one tied to a closed loop. Creation is
+# lock-guarded so racing threads cannot each build (and leak) a client.
+_async_clients = {}
+_async_client_lock = threading.Lock()
+
+def _get_async_client():
+    loop = asyncio.get_running_loop()
+    with _async_client_lock:
+        # Drop clients whose loops have closed; their connections are gone
+        # and the entries would otherwise accumulate across asyncio.run calls
+        for stale_loop in [l for l in _async_clients if l.is_closed()]:
+            del _async_clients[stale_loop]
+        client = _async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                timeout=10,
+                params=_DUKE_API_PARAMS,
+                limits=httpx.Limits(max_keepalive_connections=20),
+                # connect-level retries, matching the sync session's policy
+                transport=httpx.AsyncHTTPTransport(retries=3)
+            )
+            _async_clients[loop] = client
+    return client
+
+async def aget_curriculum_with_subject_from_duke_api(subject: str):
+    """
+    Async variant of get_curriculum_with_subject_from_duke_api, using the
+    shared pooled HTTP client so concurrent tool calls overlap on the network.
+    Shares the sync variant's TTL cache.
+    """
+    key = _cache_key('get_curriculum_with_subject_from_duke_api', subject)
+    with _cache_lock:
+        if key in _curriculum_cache:
+            return _curriculum_cache[key]
 
-    url = f'https://streamer.oit.duke.edu/ldap/people?q={name_url}&access_token=19d3636f71c152dd13840724a8a48074'
+    subject_url = _fast_quote(subject)
+    url = f'{_STREAMER_BASE}/curriculum/courses/subject/{subject_url}'
 
-    response = requests.get(url)
+    response = await _get_async_client().get(url)
 
     if response.status_code == 200:
-        return response.text
+        try:
+            # json.loads takes the response bytes directly; skipping .text
+            # avoids a full decode of a payload that is re-parsed anyway
+            data = _json_loads(response.content)
+
+            # Limit the number of courses returned (e.g., first 5)
+            if isinstance(data, list) and len(data) > 5:
+                limited_data = data[:5]
+                limited_response = {
+                    "courses": limited_data,
+                    "note": f"Showing 5 out of {len(data)} courses. Use more specific queries to refine results."
+                }
+                result = _json_dumps(limited_response)
+            else:
+                result = response.text[:1000]
+        except ValueError:
+            result = "Error: Could not parse API response"
     else:
-        return f"Failed to fetch data: {response.status_code}"
+        result = f"Failed to fetch data: {response.status_code}"
+
+    if _cacheable(result):
+        with _cache_lock:
+            _curriculum_cache[key] = result
+    return result
+
+async def aget_course_details_single_input(arg_str: str) -> str:
+    """
+    Async variant of get_course_details_single_input. Shares the sync
+    variant's TTL cache.
+    """
+    key = _cache_key('get_course_details_single_input', arg_str)
+    with _cache_lock:
+        if key in _curriculum_cache:
+            return _curriculum_cache[key]
+
+    try:
+        course_id, course_offer_number = arg_str.split(",")
+        course_id = course_id.strip()
+        course_offer_number = course_offer_number.strip()
+    except ValueError:
+        return "Error: Please provide input in the form 'course_id,course_offer_number'"
+
+    url = f'{_STREAMER_BASE}/curriculum/courses/crse_id/{course_id}/crse_offer_nbr/{course_offer_number}'
+    response = await _get_async_client().get(url)
+
+    if response.status_code == 200:
+        result = response.text
+    else:
+        result = f"Failed to fetch data: {response.status_code}"
+
+    if _cacheable(result):
+        with _cache_lock:
+            _curriculum_cache[key] = result
+    return result
+
+async def aget_people_information_from_duke_api(name: str):
+    """
+    Async variant of get_people_information_from_duke_api. Shares the sync
+    variant's TTL cache.
+    """
+    key = _cache_key('get_people_information_from_duke_api', name)
+    with _cache_lock:
+        if key in _people_cache:
+            return _people_cache[key]
+
+    name_url = _fast_quote(name)
+    url = f'{_STREAMER_BASE}/ldap/people?q={name_url}'
+
+    response = await _get_async_client().get(url)
+
+    if response.status_code == 200:
+        result = response.text
+    else:
+        result = f"Failed to fetch data: {response.status_code}"
+
+    if _cacheable(result):
+        with _cache_lock:
+            _people_cache[key] = result
+    return result
+
+async def aget_events_from_duke_api_single_input(arg_str: str) -> str:
+    """
+    Async wrapper for the events tool. The events pipeline includes a sync
+    LLM mapping call, so it runs in a worker thread rather than being
+    rewritten; this still lets it overlap with other tool calls.
+    """
+    return await asyncio.to_thread(get_events_from_duke_api_single_input, arg_str)
 
 def search_subject_by_code(query):
     """
@@ -428,103 +897,180 @@ def search_subject_by_code(query):
     Returns:
         str: JSON string containing matching subjects.
     """
-    # Search by code (like "AIPI" or "CS")
+    # Normalize the query once, the same way the index normalizes codes
+    # (lowercased, dashes and spaces stripped), so the loop body does plain
+    # substring tests against precomputed forms with no per-entry allocation
+    query_lower = query.lower()
+    query_compact = query_lower.replace('-', '').replace(' ', '')
+
+    # Single pass over the prebuilt index, collecting code matches (like
+    # "AIPI" or "CS") and name matches (like "computer science") separately
+    # so code matches can keep their priority in the combined result. Only
+    # five matches are ever returned, so the scan stops once code matches
+    # alone can fill the result, and name matches stop collecting at five.
     code_matches = []
-    for subject in valid_subjects:
-        parts = subject.split(' - ')
-        if len(parts) >= 2:
-            code = parts[0].strip()
-            # Look for the query in the code part
-            if query.lower() in code.lower() or query.lower().replace(' ', '') in code.lower().replace('-', '').replace(' ', ''):
-                code_matches.append(subject)
-    
-    # Search by name/description (like "computer science" or "artificial intelligence")
     name_matches = []
-    for subject in valid_subjects:
-        parts = subject.split(' - ')
-        if len(parts) >= 2:
-            name = parts[1].strip()
-            # Look for the query in the name part
-            if query.lower() in name.lower():
-                name_matches.append(subject)
-    
-    # Combine results with code matches first (removing duplicates)
-    all_matches = code_matches + [m for m in name_matches if m not in code_matches]
-    
-    return json.dumps({
+    for code, code_compact, name, subject in _get_subject_index():
+        if query_lower in code or query_compact in code_compact:
+            code_matches.append(subject)
+            if len(code_matches) >= 5:
+                break
+        elif len(name_matches) < 5 and query_lower in name:
+            name_matches.append(subject)
+
+    # Combine results with code matches first, deduplicating with a set so
+    # membership tests stay O(1) instead of rescanning the code-match list
+    seen = set(code_matches)
+    all_matches = code_matches + [m for m in name_matches if m not in seen]
+
+    # Fuzzy fallback for typos and loose phrasings with no substring match
+    if not all_matches:
+        all_matches = _fuzzy_matches(query, _load_options('valid_subjects'))
+
+    return _json_dumps({
         "query": query,
         "matches": all_matches[:5]  # Limit to top 5 matches
     })
 
-def search_group_format(query):
+def _make_format_search(option_name: str):
     """
-    Search for groups matching a query string.
-    
-    Parameters:
-        query (str): The search term to look for in group names.
-        
-    Returns:
-        str: JSON string containing matching groups.
+    Build a search function over one of the valid-option lists.
+
+    The group and category searches were line-for-line identical apart from
+    the list they walked; one compiled code object now serves both, with the
+    closure binding only the option name. Each search does the C-level blob
+    scan first and falls back to fuzzy matching when nothing contains the
+    query as a substring.
     """
-    matches = [g for g in valid_groups if query.lower() in g.lower()]
-    
-    return json.dumps({
-        "query": query,
-        "matches": matches[:5]  # Limit to top 5 matches
-    })
+    def _search(query):
+        query_lower = query.lower()
+        # Newline in the query would let a match span two entries; a query
+        # with one can never match a single-line entry anyway, so drop it
+        matches = []
+        if "\n" not in query_lower:
+            blob, starts = _get_scan_blob(option_name)
+            matches = _scan_blob(query_lower, blob, starts, _load_options(option_name))
+
+        # Fuzzy fallback for typos and loose phrasings with no substring match
+        if not matches:
+            matches = _fuzzy_matches(query, _load_options(option_name))
+
+        return _json_dumps({
+            "query": query,
+            "matches": matches[:5]  # Limit to top 5 matches
+        })
+    return _search
+
+search_group_format = _make_format_search('valid_groups')
+search_category_format = _make_format_search('valid_categories')
 
-def search_category_format(query):
+def search_formats(arg_str: str) -> str:
     """
-    Search for categories matching a query string.
-    
+    Resolve subject, group, and category formats in a single call.
+
+    Accepts a JSON object string with any of the keys 'subject', 'group',
+    and 'category', e.g. '{"subject": "cs", "category": "ai"}', and runs
+    the matching search for each provided key in-process. If the input is
+    not valid JSON, it is treated as a plain query and searched against
+    all three lists.
+
     Parameters:
-        query (str): The search term to look for in category names.
-        
+        arg_str (str): JSON object with the formats to resolve, or a plain
+                       query string.
+
     Returns:
-        str: JSON string containing matching categories.
+        str: JSON string mapping each requested key to its matches.
     """
-    matches = [c for c in valid_categories if query.lower() in c.lower()]
-    
-    return json.dumps({
-        "query": query,
-        "matches": matches[:5]  # Limit to top 5 matches
-    })
+    resolvers = {
+        "subject": search_subject_by_code,
+        "group": search_group_format,
+        "category": search_category_format,
+    }
+
+    try:
+        requested = _json_loads(arg_str)
+        if not isinstance(requested, dict):
+            raise ValueError
+    except (json.JSONDecodeError, ValueError):
+        # Plain string: search it against all three lists
+        requested = {key: arg_str for key in resolvers}
+
+    results = {}
+    for key, resolver in resolvers.items():
+        value = requested.get(key)
+        if value:
+            results[key] = _json_loads(resolver(str(value)))
+
+    return _json_dumps(results)
+
+# Circuit breaker for SerpAPI: after SERPAPI_FAIL_MAX consecutive failures
+# the call fails fast for SERPAPI_RESET_TIMEOUT seconds instead of stalling
+# every agent turn on a provider that is already down. This caps the
+# worst-case tail latency of a PrattSearch-heavy query.
+SERPAPI_FAIL_MAX = 3
+SERPAPI_RESET_TIMEOUT = 60
+_serpapi_failures = 0
+_serpapi_open_until = 0.0
 
-def get_pratt_info_from_serpapi(query="Duke Pratt School of Engineering", api_key=None, filter_domain=True):
+@retry(stop=stop_after_attempt(2),
+       wait=wait_exponential(multiplier=0.5, max=4),
+       retry=retry_if_exception_type(requests.exceptions.RequestException),
+       reraise=True)
+def _serpapi_get(url: str, timeout: int):
+     """
+     GET a SerpAPI URL with one exponential-backoff retry on transient
+     request errors.
+     """
+     response = _session.get(url, timeout=timeout)
+     response.raise_for_status()
+     return response
+
+def get_pratt_info_from_serpapi(query="Duke Pratt School of Engineering", api_key=None, filter_domain=True, timeout=5):
      """
      Retrieve information about Duke's Pratt School of Engineering using SerpAPI.
      Args:
         query (str): The search query to use for retrieving information.
         api_key (str): Optional; SerpAPI key. If not provided, it will be read from the environment variable SERPAPI_API_KEY.
         filter_domain (bool): If True, filter results to prioritize pratt.duke.edu and duke.edu domains.
+        timeout (int): Per-request timeout in seconds. Kept aggressive so a slow SerpAPI cannot stall the whole agent turn.
      Returns:
         str: JSON string containing the search results or an error message.
      """
+     global _serpapi_failures, _serpapi_open_until
+
      if api_key is None:
          api_key = os.environ.get("SERPAPI_API_KEY")
          if not api_key:
              return json.dumps({"error": "SerpAPI key not found. Please provide an API key or set SERPAPI_API_KEY environment variable."})
-     
+
+     # Fail fast while the circuit is open
+     if time.monotonic() < _serpapi_open_until:
+         return json.dumps({"error": "SerpAPI temporarily unavailable (circuit open after repeated failures). Try again shortly."})
+
      # Ensure the query includes Duke Pratt
      if "duke pratt" not in query.lower():
          query = f"Duke Pratt School of Engineering {query}"
-     
+
      # Construct the SerpAPI URL with the query
      encoded_query = quote(query)
      url = f"https://serpapi.com/search.json?q={encoded_query}&engine=google&num=10&api_key={api_key}"
-     
+
      try:
-         # Make the request to SerpAPI
-         response = requests.get(url, timeout=15)
-         response.raise_for_status()
-         
+         # Make the request to SerpAPI (with retry on transient errors)
+         response = _serpapi_get(url, timeout)
+
          search_results = response.json()
-         
+
          processed_results = process_serpapi_results(search_results, filter_domain)
-         
+
+         _serpapi_failures = 0
          return json.dumps(processed_results)
-         
+
      except requests.exceptions.RequestException as e:
+         _serpapi_failures += 1
+         if _serpapi_failures >= SERPAPI_FAIL_MAX:
+             _serpapi_open_until = time.monotonic() + SERPAPI_RESET_TIMEOUT
+             _serpapi_failures = 0
          return json.dumps({"error": f"Failed to fetch data from SerpAPI: {str(e)}"})
      except json.JSONDecodeError:
          return json.dumps({"error": "Failed to parse SerpAPI response as JSON"})